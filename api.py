@@ -1,10 +1,33 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-import subprocess
+from fastapi.responses import ORJSONResponse
+import asyncio
+import logging
+import multiprocessing
 import os
-import sys
-import json
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import ahocorasick
+import orjson
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from scrapy.utils.project import get_project_settings
+from twisted.internet import reactor
+
+from bolagsplatsen_scraper.spiders.bolagsplatsen import BolagsplatsenSpider
+
+os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'bolagsplatsen_scraper.settings')
+
+# uvicorn only configures its own uvicorn.* loggers, so without a handler of
+# our own the INFO-level status messages would be dropped
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
 app = FastAPI(
     title="Bolagsplatsen Scraper API",
@@ -12,192 +35,306 @@ app = FastAPI(
     version="1.0.0"
 )
 
-def translate_text(text):
+# Precompiled once at import time so the per-listing hot path doesn't
+# re-parse the pattern on every call; comma and dot both act as the
+# decimal separator ("2,5 mkr" style) while spaces group thousands
+# ("2 500 000 kr" style)
+_PRICE_RE = re.compile(r'(?P<int>\d+(?:[ \xa0]\d{3})*)(?:[.,](?P<frac>\d+))?')
+
+# Strips the space/no-break-space thousand separators in one C-level pass
+_PRICE_TRANS = str.maketrans({' ': '', '\xa0': ''})
+
+# Batches smaller than this are transformed serially; the process pool only
+# pays off once there is enough work to amortize worker startup and pickling
+_PARALLEL_THRESHOLD = 64
+
+# Simple Swedish to English translations for common business terms
+_TRANSLATIONS = {
+    'företag': 'company',
+    'till salu': 'for sale',
+    'omsättning': 'revenue',
+    'resultat': 'profit',
+    'anställda': 'employees',
+    'prisidé': 'asking price',
+    'mkr': 'MSEK',
+    'sek': 'SEK',
+    'kr': 'SEK'
+}
+
+# Aho-Corasick automaton over the Swedish terms; matching runs in C in a
+# single linear pass, and iter_long keeps the longest-match behavior so
+# e.g. 'mkr' still wins over 'kr'
+_TRANS_AUTOMATON = ahocorasick.Automaton()
+for _swedish, _english in _TRANSLATIONS.items():
+    _TRANS_AUTOMATON.add_word(_swedish, (len(_swedish), _english))
+_TRANS_AUTOMATON.make_automaton()
+del _swedish, _english
+
+# English titles for the structured content sections scraped from listings
+_SECTION_NAMES = {
+    'company_brief': 'Company Overview',
+    'potential': 'Growth Potential',
+    'reason_for_sale': 'Reason for Sale',
+    'price_idea': 'Pricing Details',
+    'summary': 'Summary',
+    'description': 'Description',
+    'business_activity': 'Business Activity',
+    'market': 'Market Information',
+    'competition': 'Competitive Situation'
+}
+
+@lru_cache(maxsize=4096)
+def translate_text(text: str) -> str:
     """Translate Swedish text to English (simplified)"""
     if not text:
         return text
-    
-    # Simple Swedish to English translations for common business terms
-    translations = {
-        'företag': 'company',
-        'till salu': 'for sale',
-        'omsättning': 'revenue',
-        'resultat': 'profit',
-        'anställda': 'employees',
-        'prisidé': 'asking price',
-        'mkr': 'MSEK',
-        'sek': 'SEK',
-        'kr': 'SEK'
-    }
-    
-    translated = text
-    for swedish, english in translations.items():
-        translated = translated.replace(swedish, english)
-    
-    return translated
 
-def convert_currency(price_str):
+    # Stitch the output from unmatched spans and replacements; iter_long
+    # yields non-overlapping matches left to right
+    parts = []
+    last = 0
+    for end, (length, english) in _TRANS_AUTOMATON.iter_long(text):
+        start = end - length + 1
+        parts.append(text[last:start])
+        parts.append(english)
+        last = end + 1
+
+    if not parts:
+        return text
+
+    parts.append(text[last:])
+    return ''.join(parts)
+
+@lru_cache(maxsize=2048)
+def convert_currency(price_str: str) -> str:
     """Convert SEK prices to USD (simplified)"""
     if not price_str:
         return "$0"
     
-    # Extract numbers from price string
-    numbers = re.findall(r'[\d,]+', price_str)
-    if numbers:
-        try:
-            # Convert SEK to USD (approximate rate: 1 SEK = 0.1 USD)
-            sek_amount = float(numbers[0].replace(',', '.'))
-            usd_amount = sek_amount * 0.1
-            return f"${usd_amount:.0f}"
-        except ValueError:
-            pass
-    
+    # Extract the first number from the price string
+    match = _PRICE_RE.search(price_str)
+    if match:
+        # Stay in the int domain for the common whole-SEK case; only the
+        # fractional part needs float arithmetic
+        sek_amount = int(match.group('int').translate(_PRICE_TRANS))
+        frac = match.group('frac')
+        if frac:
+            sek_amount += int(frac) / 10 ** len(frac)
+        # Convert SEK to USD (approximate rate: 1 SEK = 0.1 USD)
+        usd_amount = sek_amount * 0.1
+        return f"${usd_amount:.0f}"
+
     return price_str
 
-def run_scraper():
-    """Run the Scrapy spider and return fresh live data"""
+# (item key, label, converter) specs driving the detail sections of the
+# transformed listing; a None converter keeps the value verbatim
+_FINANCIAL_FIELDS = (
+    ('revenue', 'Revenue', translate_text),
+    ('detailed_revenue', 'Detailed Revenue', translate_text),
+    ('profit_status', 'Profit Status', translate_text),
+    ('detailed_profit', 'Detailed Profit', translate_text),
+    ('price', 'Asking Price', convert_currency),
+)
+_BUSINESS_FIELDS = (
+    ('employee_count', 'Employees', translate_text),
+)
+_CONTACT_FIELDS = (
+    ('phone', 'Phone', None),
+    ('email', 'Email', None),
+    ('broker_name', 'Broker', translate_text),
+    ('broker_company', 'Broker Company', translate_text),
+)
+
+# The Twisted reactor is shared by all crawls and cannot be restarted, so it
+# runs once in a background thread for the lifetime of the worker
+_reactor_lock = threading.Lock()
+_reactor_started = False
+
+def _ensure_reactor():
+    """Start the shared Twisted reactor in a background thread (once)"""
+    global _reactor_started
+    with _reactor_lock:
+        if not _reactor_started:
+            threading.Thread(
+                target=reactor.run,
+                kwargs={"installSignalHandlers": False},
+                daemon=True,
+            ).start()
+            _reactor_started = True
+
+def _crawl_items(transform=None):
+    """Run the spider on the shared reactor and collect its items in memory
+
+    If a transform callable is given, it is applied to each item as it is
+    scraped, so the CPU work overlaps the crawl's network waits instead of
+    running as a separate pass afterwards.
+    """
+    _ensure_reactor()
+
+    items = []
+
+    def collect_item(item, response, spider):
+        data = dict(item)
+        items.append(transform(data) if transform else data)
+
+    runner = CrawlerRunner(get_project_settings())
+    crawler = runner.create_crawler(BolagsplatsenSpider)
+    crawler.signals.connect(collect_item, signal=signals.item_scraped)
+
+    finished = threading.Event()
+    errors = []
+
+    def start_crawl():
+        deferred = runner.crawl(crawler)
+        deferred.addErrback(errors.append)
+        deferred.addBoth(lambda _: finished.set())
+
+    reactor.callFromThread(start_crawl)
+    finished.wait()
+
+    if errors:
+        raise RuntimeError(f"Crawl failed: {errors[0]}")
+
+    return items
+
+def _transform_item(item: dict) -> dict:
+    """Transform one scraped listing into the expected response format"""
+    # Create details sections from the scraped data
+    details_sections = []
+
+    # Add business description section (use full description if available)
+    if (description_text := item.get('full_description') or item.get('description', '')):
+        details_sections.append({
+            "infoSummary": "Business Description",
+            "infoItems": [translate_text(description_text)]
+        })
+
+    # Add structured content sections if available
+    if (structured_content := item.get('structured_content')):
+        for section_key, section_content in structured_content.items():
+            if section_content and len(str(section_content).strip()) > 20:
+                section_title = _SECTION_NAMES.get(section_key, section_key.replace('_', ' ').title())
+                details_sections.append({
+                    "infoSummary": section_title,
+                    "infoItems": [translate_text(str(section_content))]
+                })
+
+    # Bind repeatedly used fields once instead of re-fetching them per use
+    price = item.get('price', '')
+    broker_name = item.get('broker_name', '')
+    phone = item.get('phone', '')
+
+    # Add financial metrics section
+    financial_items = []
+    for key, label, convert in _FINANCIAL_FIELDS:
+        if (value := item.get(key)):
+            financial_items.append(f"{label}: {convert(value)}")
+
+    # Add additional financial details; map + extend run the loop in C
+    financial_items.extend(map(translate_text, item.get('financial_details') or ()))
+
+    if financial_items:
+        details_sections.append({
+            "infoSummary": "Financial Information",
+            "infoItems": financial_items
+        })
+
+    # Add business metrics section
+    business_items = []
+    for key, label, convert in _BUSINESS_FIELDS:
+        if (value := item.get(key)):
+            business_items.append(f"{label}: {convert(value)}")
+
+    if business_items:
+        details_sections.append({
+            "infoSummary": "Business Metrics",
+            "infoItems": business_items
+        })
+
+    # Add contact information section
+    contact_items = []
+    for key, label, convert in _CONTACT_FIELDS:
+        if (value := item.get(key)):
+            contact_items.append(f"{label}: {convert(value) if convert else value}")
+
+    if contact_items:
+        details_sections.append({
+            "infoSummary": "Contact Information",
+            "infoItems": contact_items
+        })
+
+    # Create the transformed item
+    title = item.get("title", "")
+    category = item.get("category", "")
+    return {
+        "title": title,
+        "company": title,  # Use title as company name
+        "location": item.get("location", ""),
+        "price": convert_currency(price),
+        "category": category,
+        "industry": category,  # Use category as industry
+        "link": item.get("url", ""),
+        "details": details_sections,
+        "business_name": title,
+        "contact_name": broker_name,
+        "phone_number": phone
+    }
+
+def run_scraper(raw=False):
+    """Run the Scrapy spider and return fresh live data
+
+    With raw=True the scraped items are returned as-is, skipping the
+    translation and currency-conversion transform entirely.
+    """
     try:
-        print("🔄 Starting live scraping from Bolagsplatsen...")
-        
-        # Always run the scraper to get fresh data
-        cmd = [sys.executable, "start_scraper.py"] if os.path.exists("start_scraper.py") else ["scrapy", "crawl", "bolagsplatsen"]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            cwd=os.getcwd()  # Use current working directory instead of hardcoded path
-        )
-        
-        if result.returncode == 0:
-            print("✅ Scraper completed successfully")
-            
-            # Load the fresh scraped data
-            if os.path.exists("bolagsplatsen_listings.json"):
-                with open("bolagsplatsen_listings.json", "r", encoding="utf-8") as f:
-                    raw_data = json.load(f)
-                    print(f"📊 Loaded {len(raw_data)} fresh listings from live scraping")
-            else:
-                print("❌ No output file created by scraper")
-                return None
-        else:
-            print(f"❌ Scraper failed: {result.stderr}")
+        logger.info("Starting live scraping from Bolagsplatsen...")
+
+        # Run the spider in-process, transforming each listing as it is
+        # scraped so the translation work overlaps the crawl's network waits
+        try:
+            data = _crawl_items(transform=None if raw else _transform_item)
+            logger.info("Scraper completed successfully")
+            logger.info("Collected %d fresh listings from live scraping", len(data))
+        except Exception as e:
+            logger.error("Scraper failed: %s", e)
+            data = None
+
+        if data:
+            return data
+
+        # Fall back to the output file of the last successful crawl
+        if not os.path.exists("bolagsplatsen_listings.json"):
+            logger.error("No data available from scraper")
             return None
-        
+
+        # orjson wants bytes; reading binary also skips the UTF-8 decode
+        with open("bolagsplatsen_listings.json", "rb") as f:
+            raw_data = orjson.loads(f.read())
+            logger.info("Loaded %d listings from last crawl output", len(raw_data))
+
         if not raw_data:
             return None
-        
-        # Transform the data to match the expected format with translation and USD conversion
-        transformed_data = []
-        for item in raw_data:
-            # Create details sections from the scraped data
-            details_sections = []
-            
-            # Add business description section (use full description if available)
-            description_text = item.get('full_description') or item.get('description', '')
-            if description_text:
-                details_sections.append({
-                    "infoSummary": "Business Description",
-                    "infoItems": [translate_text(description_text)]
-                })
-            
-            # Add structured content sections if available
-            if item.get('structured_content'):
-                structured_content = item.get('structured_content', {})
-                for section_key, section_content in structured_content.items():
-                    if section_content and len(str(section_content).strip()) > 20:
-                        # Translate section names
-                        section_names = {
-                            'company_brief': 'Company Overview',
-                            'potential': 'Growth Potential',
-                            'reason_for_sale': 'Reason for Sale',
-                            'price_idea': 'Pricing Details',
-                            'summary': 'Summary',
-                            'description': 'Description',
-                            'business_activity': 'Business Activity',
-                            'market': 'Market Information',
-                            'competition': 'Competitive Situation'
-                        }
-                        
-                        section_title = section_names.get(section_key, section_key.replace('_', ' ').title())
-                        details_sections.append({
-                            "infoSummary": section_title,
-                            "infoItems": [translate_text(str(section_content))]
-                        })
-            
-            # Add financial metrics section
-            financial_items = []
-            if item.get('revenue'):
-                financial_items.append(f"Revenue: {translate_text(item.get('revenue', ''))}")
-            if item.get('detailed_revenue'):
-                financial_items.append(f"Detailed Revenue: {translate_text(item.get('detailed_revenue', ''))}")
-            if item.get('profit_status'):
-                financial_items.append(f"Profit Status: {translate_text(item.get('profit_status', ''))}")
-            if item.get('detailed_profit'):
-                financial_items.append(f"Detailed Profit: {translate_text(item.get('detailed_profit', ''))}")
-            if item.get('price'):
-                financial_items.append(f"Asking Price: {convert_currency(item.get('price', ''))}")
-            
-            # Add additional financial details
-            if item.get('financial_details'):
-                for detail in item.get('financial_details', []):
-                    financial_items.append(translate_text(detail))
-            
-            if financial_items:
-                details_sections.append({
-                    "infoSummary": "Financial Information",
-                    "infoItems": financial_items
-                })
-            
-            # Add business metrics section
-            business_items = []
-            if item.get('employee_count'):
-                business_items.append(f"Employees: {translate_text(item.get('employee_count', ''))}")
-            
-            if business_items:
-                details_sections.append({
-                    "infoSummary": "Business Metrics",
-                    "infoItems": business_items
-                })
-            
-            # Add contact information section
-            contact_items = []
-            if item.get('phone'):
-                contact_items.append(f"Phone: {item.get('phone', '')}")
-            if item.get('email'):
-                contact_items.append(f"Email: {item.get('email', '')}")
-            if item.get('broker_name'):
-                contact_items.append(f"Broker: {translate_text(item.get('broker_name', ''))}")
-            if item.get('broker_company'):
-                contact_items.append(f"Broker Company: {translate_text(item.get('broker_company', ''))}")
-            
-            if contact_items:
-                details_sections.append({
-                    "infoSummary": "Contact Information",
-                    "infoItems": contact_items
-                })
-            
-            # Create the transformed item
-            transformed_item = {
-                "title": item.get("title", ""),
-                "company": item.get("title", ""),  # Use title as company name
-                "location": item.get("location", ""),
-                "price": convert_currency(item.get("price", "")),
-                "category": item.get("category", ""),
-                "industry": item.get("category", ""),  # Use category as industry
-                "link": item.get("url", ""),
-                "details": details_sections,
-                "business_name": item.get("title", ""),
-                "contact_name": item.get("broker_name", ""),
-                "phone_number": item.get("phone", "")
-            }
-            
-            transformed_data.append(transformed_item)
-        
+
+        if raw:
+            return raw_data
+
+        # Transform the data to match the expected format with translation and
+        # USD conversion; listings are independent, so large batches are split
+        # across cores while small ones stay serial to avoid pool overhead
+        if len(raw_data) >= _PARALLEL_THRESHOLD:
+            # Spawn fresh workers rather than forking: this process carries
+            # the reactor, event-loop and to_thread threads, and forking a
+            # multi-threaded process can deadlock the children on locks held
+            # at fork time
+            with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+                transformed_data = list(executor.map(_transform_item, raw_data, chunksize=32))
+        else:
+            transformed_data = [_transform_item(item) for item in raw_data]
+
         return transformed_data
-        
+
     except Exception as e:
-        print(f"Error in run_scraper: {e}")
+        logger.error("Error in run_scraper: %s", e)
         return None
 
 @app.get("/")
@@ -215,11 +352,38 @@ async def health_check():
         "timestamp": "2025-09-02T13:00:00Z"
     }
 
-@app.get("/scrap")
-async def scrap_endpoint():
-    """Main endpoint that triggers live scraping and returns fresh data"""
+# Scrape results are cached briefly (per raw/transformed variant) so rapid
+# repeat calls don't each trigger a full crawl, and the lock coalesces
+# concurrent scrapes into a single run
+_SCRAPE_TTL = 60
+_scrape_cache = {
+    False: {'time': 0.0, 'data': None},
+    True: {'time': 0.0, 'data': None},
+}
+_scrape_lock = asyncio.Lock()
+
+@app.get("/scrap", response_class=ORJSONResponse)
+async def scrap_endpoint(raw: bool = False):
+    """Main endpoint that triggers live scraping and returns fresh data
+
+    Pass raw=true to get the scraped items as-is, without translation or
+    currency conversion.
+    """
     try:
-        data = run_scraper()
+        cache = _scrape_cache[raw]
+        data = cache['data']
+        if not data or time.time() - cache['time'] >= _SCRAPE_TTL:
+            async with _scrape_lock:
+                # A concurrent request may have refreshed the cache while we
+                # waited on the lock
+                data = cache['data']
+                if not data or time.time() - cache['time'] >= _SCRAPE_TTL:
+                    # Run the blocking scrape off the event loop so /health
+                    # and other requests stay responsive
+                    data = await asyncio.to_thread(run_scraper, raw)
+                    if data:
+                        cache['data'] = data
+                        cache['time'] = time.time()
         if data:
             return {
                 "success": True,